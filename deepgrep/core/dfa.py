@@ -0,0 +1,386 @@
+# core/dfa.py
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; DFA.find_spans falls back to Python
+    njit = None
+
+from .matcher import *
+from .nfa import CHAR, TEST, SPLIT, JMP, MATCH, ProgramBuilder
+
+DEAD = 0            # state 0 is the empty state set: no match is possible any more
+MAX_STATES = 256    # give up (and keep using the PikeVM) past this many states;
+                    # subset construction runs on the request thread
+ALPHABET = 256      # the DFA runs over latin-1 code units
+CODEGEN_MAX_STATES = 32  # larger automata keep the table-driven longest_match
+
+
+def _scan(trans, accept, buf, start, anchored_start, anchored_end, first):
+    """
+    Scan a uint8 buffer for leftmost-longest, non-overlapping matches.
+    `first` flags the bytes that can start a match; other starts are skipped.
+
+    Returns:
+        int32 array of shape (k, 2) holding the (start, end) of each match.
+    """
+    n = buf.shape[0]
+    spans = np.empty((n, 2), dtype=np.int32)
+    count = 0
+    i = 0
+    while i < n:
+        if not anchored_start:
+            while i < n and not first[buf[i]]:
+                i += 1
+            if i == n:
+                break
+        s = start
+        best = -1
+        if accept[s] and not anchored_end:
+            best = i
+        j = i
+        while j < n:
+            s = trans[s, buf[j]]
+            if s == DEAD:
+                break
+            j += 1
+            if accept[s] and not anchored_end:
+                best = j
+        if anchored_end and j == n and accept[s]:
+            best = n
+        if best >= 0:
+            spans[count, 0] = i
+            spans[count, 1] = best
+            count += 1
+            i = max(best, i + 1)
+        else:
+            i += 1
+        if anchored_start:
+            break
+    return spans[:count]
+
+
+scan = njit(cache=True, nogil=True)(_scan) if njit is not None else None
+
+
+def _byte_test(values: List[int]) -> str:
+    """Render a condition on `c` accepting exactly the given sorted byte values."""
+    terms = []
+    lo = prev = values[0]
+    for b in values[1:] + [None]:
+        if b is not None and b == prev + 1:
+            prev = b
+            continue
+        if lo == prev:
+            terms.append(f"c == {lo}")
+        else:
+            terms.append(f"{lo} <= c <= {prev}")
+        lo = prev = b
+    if len(terms) > 2:
+        # Scattered sets (\w, negated classes) index a 256-byte constant instead
+        table = bytes(1 if b in values else 0 for b in range(ALPHABET))
+        return f"{table!r}[c]"
+    return " or ".join(terms)
+
+
+def _longest_match_source(dfa: "DFA") -> str:
+    """
+    Generate a straight-line longest_match for `dfa`: one if/elif branch per
+    state, each testing byte ranges, with the row's default target as the else.
+    """
+    accepting = dfa._accepting
+    anchored_end = dfa.anchored_end
+    out = ["def longest_match(data, pos):"]
+    if dfa.anchored_start:
+        out += ["    if pos != 0:", "        return None"]
+    out.append("    end = len(data)")
+    out.append("    best = pos" if accepting[dfa.start] and not anchored_end else "    best = None")
+    out += [f"    s = {dfa.start}", "    i = pos", "    while i < end:", "        c = data[i]", "        i += 1"]
+
+    def step(target: int, indent: str) -> List[str]:
+        if target == DEAD:
+            return [indent + "break"]
+        body = [indent + f"s = {target}"]
+        if accepting[target] and not anchored_end:
+            body.append(indent + "best = i")
+        return body
+
+    for state in range(1, len(dfa._rows)):
+        row = dfa._rows[state]
+        default = dfa.default[state]
+        out.append(f"        {'if' if state == 1 else 'elif'} s == {state}:")
+        by_target: Dict[int, List[int]] = {}
+        for b, target in enumerate(row):
+            if target != default:
+                by_target.setdefault(target, []).append(b)
+        if not by_target:
+            out += step(default, "            ")
+            continue
+        for k, (target, values) in enumerate(by_target.items()):
+            out.append(f"            {'if' if k == 0 else 'elif'} {_byte_test(values)}:")
+            out += step(target, "                ")
+        out.append("            else:")
+        out += step(default, "                ")
+    if anchored_end:
+        finals = [q for q in range(1, len(accepting)) if accepting[q]]
+        if finals:
+            out += ["    else:", f"        if s in {set(finals)}:", "            best = end"]
+    out.append("    return best")
+    return "\n".join(out) + "\n"
+
+
+@lru_cache(maxsize=256)
+def _compile_source(source: str) -> Callable[[bytes, int], Optional[int]]:
+    """exec generated matcher source once; equal automata share the function."""
+    namespace: Dict[str, object] = {}
+    exec(compile(source, "<deepgrep-dfa>", "exec"), namespace)
+    return namespace["longest_match"]
+
+
+class DFA:
+    """
+    A deterministic automaton for capture-free patterns.
+
+    Attributes:
+        transitions: int16 array of shape (nstates, 256); row 0 is the dead state.
+        accept: bool array of shape (nstates,), True for accepting states.
+        start: id of the start state.
+        anchored_start: pattern began with '^', so only position 0 can match.
+        anchored_end: pattern ended with '$', so matches must end at the line end.
+        default: per state, the most common target in its row; the other
+            bytes are the row's exceptions when it is stored sparsely.
+    """
+    def __init__(self, transitions: np.ndarray, accept: np.ndarray, start: int,
+                 anchored_start: bool, anchored_end: bool):
+        self.transitions = transitions
+        self.accept = accept
+        self.start = start
+        self.anchored_start = anchored_start
+        self.anchored_end = anchored_end
+        # Python lists index much faster than numpy arrays from interpreted code
+        self._rows = transitions.tolist()
+        self._accepting = accept.tolist()
+        self.default = [max(set(row), key=row.count) for row in self._rows]
+        # Small automata get a generated matcher that shadows the table-driven
+        # method, trading list indexing for branches on the current state.
+        if len(self._rows) <= CODEGEN_MAX_STATES:
+            self.longest_match = _compile_source(_longest_match_source(self))
+        # Bytes that leave the start state. If the start state accepts, every
+        # position matches (possibly empty) and no byte can be skipped.
+        if accept[start]:
+            self.first = np.ones(ALPHABET, dtype=bool)
+        else:
+            self.first = transitions[start] != DEAD
+        self._skip_table = None
+        if not self.first.all():
+            self._skip_table = bytes(0 if f else 1 for f in self.first.tolist())
+
+    def longest_match(self, data: bytes, pos: int) -> Optional[int]:
+        """Return the end of the longest match starting at `pos` in latin-1 `data`, or None."""
+        if self.anchored_start and pos != 0:
+            return None
+        rows, accepting, anchored_end = self._rows, self._accepting, self.anchored_end
+        end = len(data)
+        s = self.start
+        best = pos if accepting[s] and (not anchored_end or pos == end) else None
+        for i in range(pos, end):
+            s = rows[s][data[i]]
+            if s == DEAD:
+                break
+            if accepting[s] and not anchored_end:
+                best = i + 1
+        else:
+            if anchored_end and accepting[s]:
+                best = end
+        return best
+
+    def find_spans(self, data: bytes) -> List[Tuple[int, int]]:
+        """Return (start, end) of every leftmost-longest, non-overlapping match."""
+        if scan is not None:
+            buf = np.frombuffer(data, dtype=np.uint8)
+            spans = scan(self.transitions, self.accept, buf, self.start,
+                         self.anchored_start, self.anchored_end, self.first)
+            return [(start, end) for start, end in spans.tolist()]
+        spans = []
+        i = 0
+        L = len(data)
+        # Possible starts become 0 bytes, so bytes.find skips the rest in C
+        haystack = data.translate(self._skip_table) if self._skip_table is not None else None
+        while i < L:
+            if haystack is not None and not self.anchored_start:
+                i = haystack.find(0, i)
+                if i < 0:
+                    break
+            end = self.longest_match(data, i)
+            if end is not None:
+                spans.append((i, end))
+                i = max(end, i + 1)
+            else:
+                i += 1
+            if self.anchored_start:
+                break
+        return spans
+
+
+def _split_anchors(root: Matcher) -> Optional[Tuple[Matcher, bool, bool]]:
+    """
+    Strip a leading '^' and trailing '$' from the top-level sequence.
+
+    Returns:
+        (core, anchored_start, anchored_end), or None if the pattern uses
+        captures, backreferences or anchors anywhere else.
+    """
+    factors = list(root.matchers) if isinstance(root, SequenceMatcher) else [root]
+    anchored_start = bool(factors) and isinstance(factors[0], AnchorStartMatcher)
+    if anchored_start:
+        factors = factors[1:]
+    anchored_end = bool(factors) and isinstance(factors[-1], AnchorEndMatcher)
+    if anchored_end:
+        factors = factors[:-1]
+    core = SequenceMatcher(factors)
+    unsupported = (AnchorStartMatcher, AnchorEndMatcher, CaptureGroupMatcher, BackreferenceMatcher)
+    if any(isinstance(node, unsupported) for node in walk(core)):
+        return None
+    return core, anchored_start, anchored_end
+
+
+def _minimize(rows: List[List[int]], accept: List[bool], start: int) -> Tuple[List[List[int]], List[bool], int]:
+    """
+    Merge equivalent states with Hopcroft's partition refinement.
+
+    Returns:
+        (rows, accept, start) renumbered densely: the dead state's block
+        stays 0 and the rest follow in breadth-first order from start.
+    """
+    n = len(rows)
+    # Bytes with identical columns are indistinguishable; refine on one each
+    columns: Dict[tuple, int] = {}
+    for b in range(ALPHABET):
+        columns.setdefault(tuple(row[b] for row in rows), b)
+    inverse = []
+    for b in columns.values():
+        preds: List[List[int]] = [[] for _ in range(n)]
+        for q, row in enumerate(rows):
+            preds[row[b]].append(q)
+        inverse.append(preds)
+
+    blocks = [set(q for q in range(n) if accept[q]), set(q for q in range(n) if not accept[q])]
+    blocks = [block for block in blocks if block]
+    block_of = [0] * n
+    for i, block in enumerate(blocks):
+        for q in block:
+            block_of[q] = i
+    work = set(range(len(blocks)))
+    while work:
+        splitter = list(blocks[work.pop()])
+        for preds in inverse:
+            touched: Dict[int, List[int]] = {}
+            for q in splitter:
+                for p in preds[q]:
+                    touched.setdefault(block_of[p], []).append(p)
+            for y, inside in touched.items():
+                if len(inside) == len(blocks[y]):
+                    continue
+                inside = set(inside)
+                new = len(blocks)
+                blocks.append(inside)
+                blocks[y] -= inside
+                for q in inside:
+                    block_of[q] = new
+                if y in work or len(inside) <= len(blocks[y]):
+                    work.add(new)
+                else:
+                    work.add(y)
+
+    order = [block_of[DEAD]]
+    ids = {order[0]: DEAD}
+    if block_of[start] not in ids:
+        ids[block_of[start]] = len(order)
+        order.append(block_of[start])
+    k = 1
+    while k < len(order):
+        for t in rows[next(iter(blocks[order[k]]))]:
+            if block_of[t] not in ids:
+                ids[block_of[t]] = len(order)
+                order.append(block_of[t])
+        k += 1
+    new_rows = []
+    for block in order:
+        rep = next(iter(blocks[block]))
+        new_rows.append([ids[block_of[t]] for t in rows[rep]])
+    new_accept = [accept[next(iter(blocks[block]))] for block in order]
+    return new_rows, new_accept, ids[block_of[start]]
+
+
+def build_dfa(root: Matcher) -> Optional[DFA]:
+    """Build a minimal DFA by subset construction, or return None if the pattern is not eligible."""
+    split = _split_anchors(root)
+    if split is None:
+        return None
+    core, anchored_start, anchored_end = split
+    insts = ProgramBuilder().build(core).instructions
+
+    # Bytes accepted by each consuming instruction, computed once
+    accepted: Dict[int, List[int]] = {}
+    for pc, (op, a, _) in enumerate(insts):
+        if op == CHAR:
+            accepted[pc] = [ord(a)] if ord(a) < ALPHABET else []
+        elif op == TEST:
+            accepted[pc] = [b for b in range(ALPHABET) if a(chr(b))]
+
+    def closure(pcs) -> FrozenSet[int]:
+        seen = set()
+        stack = list(pcs)
+        while stack:
+            pc = stack.pop()
+            if pc in seen:
+                continue
+            seen.add(pc)
+            op, a, b = insts[pc]
+            if op == JMP:
+                stack.append(a)
+            elif op == SPLIT:
+                stack.append(a)
+                stack.append(b)
+        return frozenset(pc for pc in seen if insts[pc][0] in (CHAR, TEST, MATCH))
+
+    states: List[FrozenSet[int]] = [frozenset()]
+    ids: Dict[FrozenSet[int], int] = {frozenset(): DEAD}
+    start = closure([0])
+    ids[start] = len(states)
+    states.append(start)
+
+    rows = []
+    k = 0
+    while k < len(states):
+        row = [DEAD] * ALPHABET
+        targets: Dict[int, set] = {}
+        for pc in states[k]:
+            for b in accepted.get(pc, ()):
+                targets.setdefault(b, set()).add(pc + 1)
+        seen_targets: Dict[FrozenSet[int], int] = {}
+        for b, pcs in targets.items():
+            key = frozenset(pcs)
+            sid = seen_targets.get(key)
+            if sid is None:
+                nxt = closure(key)
+                sid = ids.get(nxt)
+                if sid is None:
+                    if len(states) >= MAX_STATES:
+                        return None
+                    sid = ids[nxt] = len(states)
+                    states.append(nxt)
+                seen_targets[key] = sid
+            row[b] = sid
+        rows.append(row)
+        k += 1
+
+    match_pcs = {pc for pc, inst in enumerate(insts) if inst[0] == MATCH}
+    rows, accept, start_id = _minimize(rows, [bool(s & match_pcs) for s in states], ids[start])
+    # One contiguous row-major table; int16 keeps a 256-byte row at 512 bytes
+    dtype = np.int16 if len(rows) < 2 ** 15 else np.int32
+    transitions = np.array(rows, dtype=dtype)
+    return DFA(transitions, np.array(accept, dtype=bool), start_id, anchored_start, anchored_end)
@@ -1,45 +1,161 @@
-# engine.py
-
-from .parser import PatternParser
-from .matcher import MatchState
-
-from functools import lru_cache
-from .parser import PatternParser
-from .matcher import MatchState
-
 # core/engine.py
-from copy import deepcopy
+import threading
 from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
 from .parser import PatternParser
+from .matcher import AnchorStartMatcher, SequenceMatcher, first_chars, first_table
+from .nfa import build_program
+from .dfa import build_dfa
+
+_CACHE_SIZE = 512
 
-@lru_cache(maxsize=512)
+@lru_cache(maxsize=_CACHE_SIZE)
 def compile_pattern(pattern: str):
     """Parse pattern once and cache the result"""
     parser = PatternParser(pattern)
     return parser.parse()
 
+
+class CompiledPattern:
+    """
+    Everything derived from a pattern string, built once and shared.
+
+    Capture-free patterns run on a DFA (for latin-1 lines), patterns without
+    backreferences on the PikeVM program, and the rest fall back to the
+    matcher tree. None of them is mutated while matching.
+    """
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self.matcher = compile_pattern(pattern)
+        self.program = build_program(self.matcher)
+        self.dfa = build_dfa(self.matcher)
+        root = self.matcher
+        if isinstance(root, SequenceMatcher) and root.matchers:
+            root = root.matchers[0]
+        self.anchored_start = isinstance(root, AnchorStartMatcher)
+        # Characters every match starts with; lets the scan jump straight to
+        # plausible start positions with str.find instead of trying each one.
+        self.first_chars = first_chars(self.matcher)
+        self._first_table = None
+        if self.first_chars is not None and len(self.first_chars) > 1:
+            self._first_table = {ord(c): 0 for c in self.first_chars}
+            if "\0" not in self.first_chars:
+                self._first_table[0] = 1
+        # Patterns starting with a class such as \d or \w have no finite first
+        # set, but on ASCII lines a 128-entry table still marks the candidates.
+        self._ascii_table = None
+        if self.first_chars is None:
+            table = first_table(self.matcher)
+            if table is not None:
+                self._ascii_table = "".join("\0" if ok else "\1" for ok in table)
+
+    def _start_finder(self, line: str) -> Optional[Callable[[int], int]]:
+        """Return a function giving the next candidate start >= i (-1 if none)."""
+        if self.first_chars is None:
+            if self._ascii_table is None or not line.isascii():
+                return None
+            haystack = line.translate(self._ascii_table)
+            return lambda i: haystack.find("\0", i)
+        if not self.first_chars:
+            return lambda i: -1  # e.g. a leading '[]': nothing can match
+        if self._first_table is None:
+            ch = next(iter(self.first_chars))
+            return lambda i: line.find(ch, i)
+        # Candidates become NUL, any real NUL is remapped, then one C-level find
+        haystack = line.translate(self._first_table)
+        return lambda i: haystack.find("\0", i)
+
+    def _dfa_input(self, line: str) -> Optional[bytes]:
+        """Return the line as latin-1 bytes if the DFA can scan it, else None."""
+        if self.dfa is None:
+            return None
+        try:
+            return line.encode("latin-1")
+        except UnicodeEncodeError:
+            return None
+
+    def longest_match(self, line: str, pos: int, memo: Optional[dict] = None) -> Optional[int]:
+        """
+        Return the end of the longest match starting at `pos`, or None.
+        `memo` is shared by the matcher tree across start positions of one line.
+        """
+        if self.program is not None:
+            return self.program.longest_match(line, pos)
+        positions = self.matcher.match_positions(line, pos, (), memo)
+        return max(positions) if positions else None
+
+    def find_spans(self, line: str) -> List[Tuple[int, int]]:
+        """Return (start, end) of every leftmost-longest, non-overlapping match."""
+        data = self._dfa_input(line)
+        if data is not None:
+            return self.dfa.find_spans(data)
+        spans = []
+        i = 0
+        L = len(line)
+        next_start = self._start_finder(line)
+        memo = {}
+        while i < L:
+            if next_start is not None:
+                i = next_start(i)
+                if i < 0:
+                    break
+            longest_pos = self.longest_match(line, i, memo)
+            if longest_pos is None:
+                if self.anchored_start:
+                    break
+                i += 1
+                continue
+            spans.append((i, longest_pos))
+            i = max(longest_pos, i + 1)
+            if self.anchored_start:
+                break
+        return spans
+
+    def search(self, line: str) -> bool:
+        """Return True if the pattern matches anywhere in the line."""
+        start_positions = [0] if self.pattern.startswith("^") else range(len(line))
+        data = self._dfa_input(line)
+        if data is not None:
+            return any(self.dfa.longest_match(data, i) is not None for i in start_positions)
+        memo = {}
+        return any(self.longest_match(line, i, memo) is not None for i in start_positions)
+
+
+# Plain dict in front of the compiler: the hottest patterns are resolved
+# with a single dict lookup instead of going through the lru_cache wrapper.
+_compiled_cache: Dict[str, CompiledPattern] = {}
+
+# Per-thread copy of the hot entries. Compiled patterns are immutable and
+# shared; each web worker thread only keeps its own index to them, so
+# lookups never touch the shared dict while another thread refills it.
+_tls = threading.local()
+
+def _get_compiled(pattern: str) -> CompiledPattern:
+    local = getattr(_tls, "cache", None)
+    if local is None:
+        local = _tls.cache = {}
+    compiled = local.get(pattern)
+    if compiled is None:
+        compiled = _compiled_cache.get(pattern)
+        if compiled is None:
+            if len(_compiled_cache) >= _CACHE_SIZE:
+                _compiled_cache.clear()
+            compiled = _compiled_cache[pattern] = CompiledPattern(pattern)
+        if len(local) >= _CACHE_SIZE:
+            local.clear()
+        local[pattern] = compiled
+    return compiled
+
 def find_matches(line: str, pattern: str):
-    matcher = deepcopy(compile_pattern(pattern))  # <-- deepcopy per use
+    compiled = _get_compiled(pattern)
+    return [line[start:end] for start, end in compiled.find_spans(line)]
+
+def find_matches_in_lines(lines: List[str], pattern: str):
+    """find_matches over several lines, flattened in order; picklable for worker processes."""
     matches = []
-    i = 0
-    L = len(line)
-
-    while i < L:
-        initial_state = MatchState(pos=i, groups={})
-        next_states = matcher.match(line, initial_state)
-        if not next_states:
-            i += 1
-            continue
-        longest_pos = max(state.pos for state in next_states)
-        matches.append(line[i:longest_pos])
-        i = max(longest_pos, i + 1)
+    for line in lines:
+        matches.extend(find_matches(line, pattern))
     return matches
 
 def match_pattern(line: str, pattern: str):
-    matcher = deepcopy(compile_pattern(pattern))  # <-- deepcopy per use
-    start_positions = [0] if pattern.startswith("^") else range(len(line))
-    for i in start_positions:
-        initial_state = MatchState(pos=i, groups={})
-        if matcher.match(line, initial_state):
-            return True
-    return False
\ No newline at end of file
+    return _get_compiled(pattern).search(line)
@@ -1,65 +1,176 @@
-import sqlite3, json
+import sqlite3, json, atexit, threading
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import List, Tuple
 
 DB_PATH = Path.home() / ".grepify_history.db"
 MAX_HISTORY = 200
+FLUSH_EVERY = 32  # buffered log_search calls written per transaction
+PRUNE_EVERY = MAX_HISTORY // 4  # trim back to MAX_HISTORY rows each time the rowid passes a multiple of this
+
+_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS search_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        pattern TEXT NOT NULL,
+        timestamp TEXT NOT NULL,
+        match_count INTEGER,
+        files TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_search_logs_pattern ON search_logs(pattern)",
+    # Per-pattern row counts kept in step with search_logs by triggers,
+    # so get_top_patterns does not have to GROUP BY the whole log.
+    """CREATE TABLE IF NOT EXISTS pattern_counts (
+        pattern TEXT PRIMARY KEY,
+        cnt INTEGER NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_pattern_counts_cnt ON pattern_counts(cnt)",
+    """CREATE TRIGGER IF NOT EXISTS trg_search_logs_insert AFTER INSERT ON search_logs
+    BEGIN
+        INSERT INTO pattern_counts (pattern, cnt) VALUES (NEW.pattern, 1)
+        ON CONFLICT(pattern) DO UPDATE SET cnt = cnt + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_search_logs_delete AFTER DELETE ON search_logs
+    BEGIN
+        UPDATE pattern_counts SET cnt = cnt - 1 WHERE pattern = OLD.pattern;
+        DELETE FROM pattern_counts WHERE pattern = OLD.pattern AND cnt <= 0;
+    END""",
+]
 
 class SearchHistoryDB:
     """SQLite-backed search history logger."""
 
-    def __init__(self, db_path: Path = DB_PATH):
+    def __init__(self, db_path: Path = DB_PATH, flush_every: int = FLUSH_EVERY):
         self.db_path = db_path
+        self.flush_every = flush_every
+        self._pending: List[Tuple] = []
+        self._lock = threading.Lock()
+        # One long-lived connection in autocommit mode; transactions are
+        # opened explicitly so a whole batch costs a single commit.
+        self.conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
         self._init_db()
+        atexit.register(self.close)
 
     def _init_db(self):
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS search_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    pattern TEXT NOT NULL,
-                    timestamp TEXT NOT NULL,
-                    match_count INTEGER,
-                    files TEXT
-                );
-            """)
+        # One IMMEDIATE transaction, so two processes upgrading an old database
+        # at once cannot both see pattern_counts missing and both backfill it.
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            has_counts = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'pattern_counts'"
+            ).fetchone()
+            for statement in _SCHEMA:
+                self.conn.execute(statement)
+            if not has_counts:
+                # Databases created before pattern_counts existed need a backfill
+                self.conn.execute("""
+                    INSERT INTO pattern_counts (pattern, cnt)
+                    SELECT pattern, COUNT(*) FROM search_logs GROUP BY pattern
+                """)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
 
-    def log_search(self, pattern: str, match_count: int, files: List[str]):
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
+    def _write(self, rows: List[Tuple]):
+        """Insert (pattern, timestamp, match_count, files_json) rows in one transaction. Caller holds the lock."""
+        if not rows:
+            return
+        self.conn.execute("BEGIN")
+        try:
+            before = self._max_id()
+            self.conn.executemany(
                 "INSERT INTO search_logs (pattern, timestamp, match_count, files) VALUES (?, ?, ?, ?)",
-                (pattern, datetime.now(timezone.utc).isoformat(), match_count, json.dumps(files)),
+                rows,
             )
-            conn.execute("""
-                DELETE FROM search_logs WHERE id NOT IN (
-                    SELECT id FROM search_logs ORDER BY id DESC LIMIT ?
-                );
-            """, (MAX_HISTORY,))
-            conn.commit()
+            # Trimming is an index range delete, done whenever the rowid crosses
+            # a multiple of PRUNE_EVERY. The rowid is stored, so short-lived
+            # instances that each log a few rows still trim on schedule, and
+            # reads cap at MAX_HISTORY so the extra rows in between stay hidden.
+            if self._max_id() // PRUNE_EVERY != before // PRUNE_EVERY:
+                self._trim()
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def _max_id(self) -> int:
+        return self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM search_logs").fetchone()[0]
+
+    def _trim(self):
+        """Delete everything but the newest MAX_HISTORY rows. Caller holds the lock."""
+        self.conn.execute(
+            "DELETE FROM search_logs WHERE id <= (SELECT MAX(id) FROM search_logs) - ?",
+            (MAX_HISTORY,),
+        )
+
+    def flush(self):
+        """Write any buffered log_search calls to the database."""
+        with self._lock:
+            rows, self._pending = self._pending, []
+            self._write(rows)
+
+    def close(self):
+        """Flush pending entries and close the connection."""
+        if self.conn is None:
+            return
+        self.flush()
+        with self._lock:
+            self.conn.close()
+            self.conn = None
+        atexit.unregister(self.close)
+
+    def log_searches(self, rows: List[Tuple[str, int, List[str]]]):
+        """Log several (pattern, match_count, files) searches in a single transaction."""
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            rows = self._pending + [
+                (pattern, now, match_count, json.dumps(files)) for pattern, match_count, files in rows
+            ]
+            self._pending = []
+            self._write(rows)
+
+    def log_search(self, pattern: str, match_count: int, files: List[str]):
+        """Buffer one search; the buffer is written every `flush_every` calls, before reads and on exit."""
+        row = (pattern, datetime.now(timezone.utc).isoformat(), match_count, json.dumps(files))
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) < self.flush_every:
+                return
+            rows, self._pending = self._pending, []
+            self._write(rows)
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        self.flush()
+        with self._lock:
+            # Rows past MAX_HISTORY that are still waiting for a periodic trim
+            # would otherwise be counted by pattern_counts; trim them first.
+            low, high = self.conn.execute("SELECT MIN(id), MAX(id) FROM search_logs").fetchone()
+            if low is not None and high - low >= MAX_HISTORY:
+                self._trim()
+            return self.conn.execute(sql, params).fetchall()
 
     def get_recent(self, limit: int = 5) -> List[Tuple]:
-        with sqlite3.connect(self.db_path) as conn:
-            return conn.execute(
-                "SELECT pattern, timestamp, match_count, files FROM search_logs ORDER BY id DESC LIMIT ?",
-                (limit,),
-            ).fetchall()
+        return self._query(
+            "SELECT pattern, timestamp, match_count, files FROM search_logs ORDER BY id DESC LIMIT ?",
+            (min(limit, MAX_HISTORY),),
+        )
 
     def get_top_patterns(self, limit: int = 5) -> List[Tuple]:
-        with sqlite3.connect(self.db_path) as conn:
-            return conn.execute("""
-                SELECT pattern, COUNT(*) as count
-                FROM search_logs
-                GROUP BY pattern
-                ORDER BY count DESC
-                LIMIT ?;
-            """, (limit,)).fetchall()
+        return self._query(
+            "SELECT pattern, cnt FROM pattern_counts ORDER BY cnt DESC LIMIT ?",
+            (limit,),
+        )
 
     def list_all(self, limit: int = None) -> List[Tuple]:
-        with sqlite3.connect(self.db_path) as conn:
-            return conn.execute(
-                "SELECT pattern, timestamp, match_count, files FROM search_logs ORDER BY id DESC"
-            ).fetchall()
+        # Every kept row, as before; `limit` is accepted but not applied. The
+        # cap only hides rows that are waiting for the next trim.
+        return self._query(
+            "SELECT pattern, timestamp, match_count, files FROM search_logs ORDER BY id DESC LIMIT ?",
+            (MAX_HISTORY,),
+        )
 
     def export_to_json(self, file_path: Path) -> int:
         rows = self.list_all()
@@ -72,24 +183,18 @@ class SearchHistoryDB:
 
     def import_from_json(self, file_path: Path) -> int:
         data = json.loads(file_path.read_text(encoding="utf-8"))
-        with sqlite3.connect(self.db_path) as conn:
-            for entry in data:
-                ts = entry.get("timestamp")
-                if ts is None:
-                    ts = datetime.now(timezone.utc).isoformat()
-                conn.execute(
-                    "INSERT INTO search_logs (pattern, timestamp, match_count, files) VALUES (?, ?, ?, ?)",
-                    (
-                        entry["pattern"],
-                        ts,
-                        entry.get("match_count", 0),
-                        json.dumps(entry.get("files", [])),
-                    ),
-                )
-            conn.execute("""
-                DELETE FROM search_logs WHERE id NOT IN (
-                    SELECT id FROM search_logs ORDER BY id DESC LIMIT ?
-                );
-            """, (MAX_HISTORY,))
-            conn.commit()
-        return len(data)
\ No newline at end of file
+        rows = []
+        for entry in data:
+            ts = entry.get("timestamp")
+            if ts is None:
+                ts = datetime.now(timezone.utc).isoformat()
+            rows.append((
+                entry["pattern"],
+                ts,
+                entry.get("match_count", 0),
+                json.dumps(entry.get("files", [])),
+            ))
+        with self._lock:
+            rows, self._pending = self._pending + rows, []
+            self._write(rows)
+        return len(data)
@@ -1,6 +1,28 @@
-from copy import deepcopy
-from dataclasses import dataclass, field
-from typing import Dict, Set, List
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Collection, Dict, Iterator, Optional, Set, List, Tuple
+
+# Capture groups as (gid, text) pairs sorted by gid; immutable, so states can
+# share them without copying and hash them without sorting.
+Groups = Tuple[Tuple[int, str], ...]
+
+
+def get_group(groups: Groups, gid: int) -> Optional[str]:
+    """Return the text captured by group `gid`, or None if it has not matched."""
+    for g, text in groups:
+        if g == gid:
+            return text
+    return None
+
+
+def set_group(groups: Groups, gid: int, text: str) -> Groups:
+    """Return a new groups tuple with `gid` set to `text`, keeping it sorted."""
+    for i, (g, _) in enumerate(groups):
+        if g == gid:
+            return groups[:i] + ((gid, text),) + groups[i + 1:]
+        if g > gid:
+            return groups[:i] + ((gid, text),) + groups[i:]
+    return groups + ((gid, text),)
 
 
 # --------------------------
@@ -14,62 +36,157 @@ class MatchState:
 
     Attributes:
         pos (int): Current position in the string being matched.
-        groups (Dict[int, str]): Dictionary storing capture group matches.
+        groups (Groups): Sorted (gid, text) pairs storing capture group matches.
     """
     pos: int
-    groups: Dict[int, str] = field(compare=False)
+    groups: Groups = ()
 
     def __hash__(self) -> int:
         """
         Hash method ensures MatchState can be used in sets.
-        Groups are sorted to maintain consistency in hashing.
+        Groups are kept sorted on insert, so no sorting is needed here.
         """
-        return hash((self.pos, tuple(sorted(self.groups.items()))))
+        return hash((self.pos, self.groups))
 
 # --------------------------
 # Matchers
 # --------------------------
+# ASCII acceptance tables for \d and \w, indexed by code point
+_DIGIT = bytes(chr(i).isdigit() for i in range(128))
+_WORD = bytes(chr(i).isalnum() or chr(i) == "_" for i in range(128))
+
+# Internally matchers pass plain (pos, groups) tuples between each other;
+# MatchState objects are only built at the public match() boundary.
+State = Tuple[int, Groups]
+
+# Per-line memo of composite end positions, keyed (id(node), pos). Only
+# subtrees that neither set nor read groups are memoized, since only their
+# results are a function of the position alone.
+Memo = Dict[Tuple[int, int], frozenset]
+
 class Matcher:
     """Abstract base class for all matchers."""
-    def match(self, line: str, state: MatchState) -> Set[MatchState]:
-        """Return a set of next possible MatchStates if this matcher succeeds."""
-        raise NotImplementedError("Subclasses must implement match() method.")
+    # Deterministic matchers reach at most one state from each input state,
+    # never change the groups, and implement match_one().
+    is_deterministic: bool = False
+    # True for composite nodes whose subtree neither sets nor reads groups.
+    # Set in __init__, so trees shared between threads are never written to.
+    memoizable: bool = False
+
+    def match(self, line: str, state: MatchState, memo: Optional[Memo] = None) -> Set[MatchState]:
+        """
+        Return a set of next possible MatchStates if this matcher succeeds.
+        Pass the same memo dict for every call on one line to share work.
+        """
+        return {MatchState(p, g) for p, g in self._match(line, state.pos, state.groups, memo)}
+
+    def _match(self, line: str, pos: int, groups: Groups, memo: Optional[Memo] = None) -> Collection[State]:
+        """Return the (pos, groups) states reachable from pos; leaves return lists."""
+        raise NotImplementedError("Subclasses must implement _match() method.")
+
+    def match_positions(self, line: str, pos: int, groups: Groups, memo: Optional[Memo] = None) -> Set[int]:
+        """Return only the end positions reachable from pos, memoized per line when possible."""
+        if memo is not None and self.memoizable:
+            key = (id(self), pos)
+            positions = memo.get(key)
+            if positions is None:
+                positions = memo[key] = frozenset(p for p, _ in self._match(line, pos, groups, memo))
+            return positions
+        return {p for p, _ in self._match(line, pos, groups, memo)}
+
+    def match_one(self, line: str, pos: int, groups: Groups) -> Optional[int]:
+        """Return the single end position of a deterministic matcher, or None."""
+        raise NotImplementedError(f"{type(self).__name__} is not deterministic")
+
+
+def _group_free(node: Matcher) -> bool:
+    """True if no node in the subtree sets or reads groups."""
+    return not any(isinstance(n, (CaptureGroupMatcher, BackreferenceMatcher)) for n in walk(node))
+
 
 class LiteralMatcher(Matcher):
     """Matches a single literal character."""
+    is_deterministic = True
     def __init__(self, char: str):
         self.char = char
 
-    def match(self, line: str, state: MatchState) -> Set[MatchState]:
-        if state.pos < len(line) and line[state.pos] == self.char:
+    def _match(self, line: str, pos: int, groups: Groups, memo: Optional[Memo] = None) -> Collection[State]:
+        if pos < len(line) and line[pos] == self.char:
             # Advance position by 1 if match
-            return {MatchState(state.pos + 1, state.groups)}
-        return set()  # No match
+            return [(pos + 1, groups)]
+        return []  # No match
+
+    def match_one(self, line: str, pos: int, groups: Groups) -> Optional[int]:
+        return pos + 1 if pos < len(line) and line[pos] == self.char else None
+
+class LiteralRunMatcher(Matcher):
+    """Matches a run of literal characters with one startswith check."""
+    is_deterministic = True
+    def __init__(self, s: str):
+        self.s = s
+
+    def _match(self, line: str, pos: int, groups: Groups, memo: Optional[Memo] = None) -> Collection[State]:
+        if line.startswith(self.s, pos):
+            return [(pos + len(self.s), groups)]
+        return []
+
+    def match_one(self, line: str, pos: int, groups: Groups) -> Optional[int]:
+        return pos + len(self.s) if line.startswith(self.s, pos) else None
+
+
+def fuse_literals(matchers: List[Matcher]) -> List[Matcher]:
+    """Collapse consecutive LiteralMatchers into LiteralRunMatchers."""
+    fused: List[Matcher] = []
+    run = ""
+    for m in matchers + [None]:
+        if isinstance(m, LiteralMatcher):
+            run += m.char
+            continue
+        if len(run) == 1:
+            fused.append(LiteralMatcher(run))
+        elif run:
+            fused.append(LiteralRunMatcher(run))
+        run = ""
+        if m is not None:
+            fused.append(m)
+    return fused
 
 class DigitMatcher(Matcher):
     """Matches a single digit character."""
-    def match(self, line: str, state: MatchState) -> Set[MatchState]:
-        if state.pos < len(line) and line[state.pos].isdigit():
-            return {MatchState(state.pos + 1, state.groups)}
-        return set()
+    is_deterministic = True
+    def _match(self, line: str, pos: int, groups: Groups, memo: Optional[Memo] = None) -> Collection[State]:
+        if pos < len(line) and line[pos].isdigit():
+            return [(pos + 1, groups)]
+        return []
+
+    def match_one(self, line: str, pos: int, groups: Groups) -> Optional[int]:
+        return pos + 1 if pos < len(line) and line[pos].isdigit() else None
 
 class WordMatcher(Matcher):
     """
     Matches a word character: alphanumeric or underscore.
     Equivalent to regex \w.
     """
-    def match(self, line: str, state: MatchState) -> Set[MatchState]:
-        if state.pos < len(line) and (line[state.pos].isalnum() or line[state.pos] == "_"):
-            return {MatchState(state.pos + 1, state.groups)}
-        return set()
+    is_deterministic = True
+    def _match(self, line: str, pos: int, groups: Groups, memo: Optional[Memo] = None) -> Collection[State]:
+        if pos < len(line) and (line[pos].isalnum() or line[pos] == "_"):
+            return [(pos + 1, groups)]
+        return []
+
+    def match_one(self, line: str, pos: int, groups: Groups) -> Optional[int]:
+        return pos + 1 if pos < len(line) and (line[pos].isalnum() or line[pos] == "_") else None
 
 
 class AnyMatcher(Matcher):
     """Matches any single character except end-of-string."""
-    def match(self, line: str, state: MatchState) -> Set[MatchState]:
-        if state.pos < len(line):
-            return {MatchState(state.pos + 1, state.groups)}
-        return set()
+    is_deterministic = True
+    def _match(self, line: str, pos: int, groups: Groups, memo: Optional[Memo] = None) -> Collection[State]:
+        if pos < len(line):
+            return [(pos + 1, groups)]
+        return []
+
+    def match_one(self, line: str, pos: int, groups: Groups) -> Optional[int]:
+        return pos + 1 if pos < len(line) else None
 
 
 class CharClassMatcher(Matcher):
@@ -79,31 +196,112 @@ class CharClassMatcher(Matcher):
     Args:
         charset: list of allowed characters
         negated: if True, matches any character NOT in charset
+        ranges: inclusive (first, last) character ranges, also allowed
     """
+    is_deterministic = True
 
-    def __init__(self, charset: List[str], negated: bool):
+    def __init__(self, charset: List[str], negated: bool, ranges: List[Tuple[str, str]] = ()):
         self.charset = charset
         self.negated = negated
-
-    def match(self, line: str, state: MatchState) -> Set[MatchState]:
-        if state.pos >= len(line):
-            return set()
-        c = line[state.pos]
-        if (not self.negated and c in self.charset) or (self.negated and c not in self.charset):
-            return {MatchState(state.pos + 1, state.groups)}
-        return set()
+        self.ranges = list(ranges)
+        # Bit i is set when chr(i) is in the class (latin-1 range); wider
+        # characters are kept as merged, sorted code point intervals, so a
+        # range like [\u0100-\U0010ffff] costs one interval, not a million entries.
+        self._mask = 0
+        wide = []
+        for lo, hi in [(ord(ch), ord(ch)) for ch in charset] + [(ord(a), ord(b)) for a, b in self.ranges]:
+            for o in range(lo, min(hi, 255) + 1):
+                self._mask |= 1 << o
+            if hi >= 256:
+                wide.append((max(lo, 256), hi))
+        self._lows: List[int] = []
+        self._highs: List[int] = []
+        for lo, hi in sorted(wide):
+            if self._highs and lo <= self._highs[-1] + 1:
+                self._highs[-1] = max(self._highs[-1], hi)
+            else:
+                self._lows.append(lo)
+                self._highs.append(hi)
+        self.size = bin(self._mask).count("1") + sum(hi - lo + 1 for lo, hi in zip(self._lows, self._highs))
+
+    def members(self) -> Iterator[str]:
+        """Yield the characters in the (non-negated) set; there are `size` of them."""
+        for o in range(256):
+            if (self._mask >> o) & 1:
+                yield chr(o)
+        for lo, hi in zip(self._lows, self._highs):
+            yield from map(chr, range(lo, hi + 1))
+
+    def accepts(self, c: str) -> bool:
+        """Return True if the single character c belongs to this class."""
+        o = ord(c)
+        if o < 256:
+            return bool((self._mask >> o) & 1) != self.negated
+        i = bisect_right(self._lows, o) - 1
+        return (i >= 0 and o <= self._highs[i]) != self.negated
+
+    def _match(self, line: str, pos: int, groups: Groups, memo: Optional[Memo] = None) -> Collection[State]:
+        if pos < len(line) and self.accepts(line[pos]):
+            return [(pos + 1, groups)]
+        return []
+
+    def match_one(self, line: str, pos: int, groups: Groups) -> Optional[int]:
+        return pos + 1 if pos < len(line) and self.accepts(line[pos]) else None
 
 class SequenceMatcher(Matcher):
     """Matches a sequence of matchers in order."""
     def __init__(self, matchers: List[Matcher]):
-        self.matchers = matchers
-
-    def match(self, line: str, state: MatchState) -> Set[MatchState]:
-        states = {state}
-        for matcher in self.matchers:
-            next_states = set()
-            for s in states:
-                next_states |= matcher.match(line, s)
+        self.matchers = fuse_literals(list(matchers))
+        # Groups cannot change inside a capture-free sequence, so only
+        # positions need to be threaded (and de-duplicated) between steps.
+        self.capture_free = not any(isinstance(n, CaptureGroupMatcher) for n in walk(self))
+        self.memoizable = bool(self.matchers) and _group_free(self)
+        # Consecutive deterministic matchers are grouped into tuples. They map
+        # distinct states to distinct states, so a run needs no set to
+        # de-duplicate and can follow each state on its own.
+        self.stages: List[object] = []
+        for m in self.matchers:
+            if not m.is_deterministic:
+                self.stages.append(m)
+            elif self.stages and isinstance(self.stages[-1], tuple):
+                self.stages[-1] += (m,)
+            else:
+                self.stages.append((m,))
+
+    @staticmethod
+    def _run(run: Tuple[Matcher, ...], line: str, pos: int, groups: Groups) -> Optional[int]:
+        """Follow one state through a run of deterministic matchers."""
+        for matcher in run:
+            pos = matcher.match_one(line, pos, groups)
+            if pos is None:
+                return None
+        return pos
+
+    def _match(self, line: str, pos: int, groups: Groups, memo: Optional[Memo] = None) -> Collection[State]:
+        run_one = self._run
+        if self.capture_free:
+            positions: Collection[int] = [pos]
+            for stage in self.stages:
+                if isinstance(stage, tuple):
+                    ends = (run_one(stage, line, p, groups) for p in positions)
+                    positions = [q for q in ends if q is not None]
+                else:
+                    positions = {q for p in positions for q in stage.match_positions(line, p, groups, memo)}
+                if not positions:
+                    break  # Early exit if no matches remain
+            return [(p, groups) for p in positions]
+        states: Collection[State] = [(pos, groups)]
+        for stage in self.stages:
+            if isinstance(stage, tuple):
+                next_states: Collection[State] = []
+                for p, g in states:
+                    q = run_one(stage, line, p, g)
+                    if q is not None:
+                        next_states.append((q, g))
+            else:
+                next_states = set()
+                for p, g in states:
+                    next_states.update(stage._match(line, p, g, memo))
             states = next_states
             if not states:
                 break  # Early exit if no matches remain
@@ -114,32 +312,39 @@ class AlternationMatcher(Matcher):
     def __init__(self, left: Matcher, right: Matcher):
         self.left = left
         self.right = right
+        self.memoizable = _group_free(self)
 
-    def match(self, line: str, state: MatchState) -> Set[MatchState]:
-        return self.left.match(line, state) | self.right.match(line, state)
+    def _match(self, line: str, pos: int, groups: Groups, memo: Optional[Memo] = None) -> Collection[State]:
+        states = set(self.left._match(line, pos, groups, memo))
+        states.update(self.right._match(line, pos, groups, memo))
+        return states
 
 
 class OptionalMatcher(Matcher):
     """Matches zero or one occurrence of a matcher (like '?')."""
     def __init__(self, matcher: Matcher):
         self.matcher = matcher
+        self.memoizable = _group_free(self)
 
-    def match(self, line: str, state: MatchState) -> Set[MatchState]:
+    def _match(self, line: str, pos: int, groups: Groups, memo: Optional[Memo] = None) -> Collection[State]:
         # Either match nothing or match the node
-        return {state} | self.matcher.match(line, state)
+        states = {(pos, groups)}
+        states.update(self.matcher._match(line, pos, groups, memo))
+        return states
 
 class PlusMatcher(Matcher):
     """Matches one or more occurrences of a matcher (like '+')."""
     def __init__(self, matcher: Matcher):
         self.matcher = matcher
+        self.memoizable = _group_free(self)
 
-    def match(self, line: str, state: MatchState) -> Set[MatchState]:
-        results = self.matcher.match(line, state)
+    def _match(self, line: str, pos: int, groups: Groups, memo: Optional[Memo] = None) -> Collection[State]:
+        results = set(self.matcher._match(line, pos, groups, memo))
         all_states = set(results)
         while results:
-            next_results = set()
-            for s in results:
-                next_results |= self.matcher.match(line, s)
+            next_results: Set[State] = set()
+            for p, g in results:
+                next_results.update(self.matcher._match(line, p, g, memo))
             new_states = next_results - all_states
             if not new_states:
                 break
@@ -152,14 +357,15 @@ class StarMatcher(Matcher):
     """Matches zero or more occurrences of a matcher (like '*')."""
     def __init__(self, matcher: Matcher):
         self.matcher = matcher
+        self.memoizable = _group_free(self)
 
-    def match(self, line: str, state: MatchState) -> Set[MatchState]:
-        all_states = {state}
-        current = {state}
+    def _match(self, line: str, pos: int, groups: Groups, memo: Optional[Memo] = None) -> Collection[State]:
+        all_states = {(pos, groups)}
+        current = all_states
         while current:
-            next_states = set()
-            for s in current:
-                next_states |= self.matcher.match(line, s)
+            next_states: Set[State] = set()
+            for p, g in current:
+                next_states.update(self.matcher._match(line, p, g, memo))
             new_states = next_states - all_states
             if not new_states:
                 break
@@ -174,14 +380,22 @@ class StarMatcher(Matcher):
 
 class AnchorStartMatcher(Matcher):
     """Matches start of string (^)."""
-    def match(self, line: str, state: MatchState) -> Set[MatchState]:
-        return {state} if state.pos == 0 else set()
+    is_deterministic = True
+    def _match(self, line: str, pos: int, groups: Groups, memo: Optional[Memo] = None) -> Collection[State]:
+        return [(pos, groups)] if pos == 0 else []
+
+    def match_one(self, line: str, pos: int, groups: Groups) -> Optional[int]:
+        return pos if pos == 0 else None
 
 
 class AnchorEndMatcher(Matcher):
     """Matches end of string ($)."""
-    def match(self, line: str, state: MatchState) -> Set[MatchState]:
-        return {state} if state.pos == len(line) else set()
+    is_deterministic = True
+    def _match(self, line: str, pos: int, groups: Groups, memo: Optional[Memo] = None) -> Collection[State]:
+        return [(pos, groups)] if pos == len(line) else []
+
+    def match_one(self, line: str, pos: int, groups: Groups) -> Optional[int]:
+        return pos if pos == len(line) else None
 
 # --------------------------
 # Capture Groups & Backreferences
@@ -193,28 +407,147 @@ class CaptureGroupMatcher(Matcher):
         self.matcher = matcher
         self.gid = gid
 
-    def match(self, line: str, state: MatchState) -> Set[MatchState]:
-        results = self.matcher.match(line, state)
-        updated = set()
-        for r in results:
-            gcopy = deepcopy(r.groups)
-            gcopy[self.gid] = line[state.pos:r.pos]
-            updated.add(MatchState(r.pos, gcopy))
-        return updated
+    def _match(self, line: str, pos: int, groups: Groups, memo: Optional[Memo] = None) -> Collection[State]:
+        return {
+            (p, set_group(g, self.gid, line[pos:p]))
+            for p, g in self.matcher._match(line, pos, groups, memo)
+        }
 
 
 class BackreferenceMatcher(Matcher):
     """Matches the same string as previously captured in a group."""
+    is_deterministic = True
     def __init__(self, gid: int):
         self.gid = gid
 
-    def match(self, line: str, state: MatchState) -> Set[MatchState]:
-        if self.gid not in state.groups:
-            return set()
-        ref = state.groups[self.gid]
-        if line[state.pos:state.pos + len(ref)] == ref:
-            return {MatchState(state.pos + len(ref), state.groups)}
-        return set()
+    def _match(self, line: str, pos: int, groups: Groups, memo: Optional[Memo] = None) -> Collection[State]:
+        ref = get_group(groups, self.gid)
+        if ref is None:
+            return []
+        if line.startswith(ref, pos):
+            return [(pos + len(ref), groups)]
+        return []
+
+    def match_one(self, line: str, pos: int, groups: Groups) -> Optional[int]:
+        ref = get_group(groups, self.gid)
+        if ref is not None and line.startswith(ref, pos):
+            return pos + len(ref)
+        return None
+
+# --------------------------
+# Tree traversal
+# --------------------------
+
+def children(node: Matcher) -> List[Matcher]:
+    """Return the direct sub-matchers of a node."""
+    if isinstance(node, SequenceMatcher):
+        return list(node.matchers)
+    if isinstance(node, AlternationMatcher):
+        return [node.left, node.right]
+    if isinstance(node, Quantified):
+        return [node.node]
+    inner = getattr(node, "matcher", None)
+    return [inner] if inner is not None else []
+
+
+def walk(node: Matcher) -> Iterator[Matcher]:
+    """Yield every node of the matcher tree, depth first."""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        yield current
+        stack.extend(children(current))
+
+
+def _first(node: Matcher) -> Tuple[List[Matcher], bool]:
+    """
+    Return (leaves, nullable) for a node: the leaf matchers that can consume
+    the first character of a match, and whether it can match the empty string.
+    """
+    if isinstance(node, (LiteralMatcher, LiteralRunMatcher, CharClassMatcher,
+                         DigitMatcher, WordMatcher, AnyMatcher)):
+        return [node], False
+    if isinstance(node, (AnchorStartMatcher, AnchorEndMatcher)):
+        return [], True
+    if isinstance(node, SequenceMatcher):
+        leaves: List[Matcher] = []
+        for m in node.matchers:
+            f, nullable = _first(m)
+            leaves += f
+            if not nullable:
+                return leaves, False
+        return leaves, True
+    if isinstance(node, AlternationMatcher):
+        lf, ln = _first(node.left)
+        rf, rn = _first(node.right)
+        return lf + rf, ln or rn
+    if isinstance(node, (OptionalMatcher, StarMatcher)):
+        return _first(node.matcher)[0], True
+    if isinstance(node, (PlusMatcher, CaptureGroupMatcher)):
+        return _first(node.matcher)
+    if isinstance(node, Quantified):
+        f, nullable = _first(node.node)
+        if node.kind in ("?", "*"):
+            return f, True
+        if node.kind.startswith("{"):
+            low = node.kind[1:-1].split(",")[0]
+            return f, nullable or not low.isdigit() or int(low) == 0
+        return f, nullable
+    # Backreferences: the captured text is unknown and may be empty
+    return [node], True
+
+
+FIRST_CHARS_MAX = 256  # larger classes are treated as unbounded by first_chars
+
+
+def first_chars(node: Matcher) -> Optional[frozenset]:
+    """
+    Return the set of characters every non-empty match must start with,
+    or None if it is unbounded, too large to be a useful filter, or the
+    pattern can match the empty string.
+    """
+    leaves, nullable = _first(node)
+    if nullable:
+        return None
+    first: Set[str] = set()
+    for leaf in leaves:
+        if isinstance(leaf, LiteralMatcher):
+            first.add(leaf.char)
+        elif isinstance(leaf, LiteralRunMatcher):
+            first.add(leaf.s[0])
+        elif isinstance(leaf, CharClassMatcher) and not leaf.negated and leaf.size <= FIRST_CHARS_MAX:
+            first.update(leaf.members())
+        else:
+            return None
+    return frozenset(first)
+
+
+def first_table(node: Matcher) -> Optional[bytes]:
+    """
+    Return a 128-entry table flagging the ASCII characters a non-empty match
+    can start with, or None if it would not rule any of them out.
+    """
+    leaves, nullable = _first(node)
+    if nullable:
+        return None
+    table = bytearray(128)
+    for leaf in leaves:
+        if isinstance(leaf, (LiteralMatcher, LiteralRunMatcher)):
+            o = ord(leaf.char if isinstance(leaf, LiteralMatcher) else leaf.s[0])
+            if o < 128:
+                table[o] = 1
+            continue
+        if isinstance(leaf, DigitMatcher):
+            accepted = _DIGIT
+        elif isinstance(leaf, WordMatcher):
+            accepted = _WORD
+        elif isinstance(leaf, CharClassMatcher):
+            accepted = bytes(leaf.accepts(chr(i)) for i in range(128))
+        else:
+            return None  # '.' or a backreference can start anywhere
+        for i in range(128):
+            table[i] |= accepted[i]
+    return None if all(table) else bytes(table)
 
 # --------------------------
 # Quantifiers
@@ -227,66 +560,60 @@ class Quantified(Matcher):
     def __init__(self, node: Matcher, kind: str):
         self.node = node
         self.kind = kind
-
-    def match(self, line: str, state: MatchState) -> Set[MatchState]:
-        if self.kind == "?":
-            return {state} | self.node.match(line, state)
-        elif self.kind == "+":
-            return PlusMatcher(self.node).match(line, state)
-        elif self.kind == "*":
-            return StarMatcher(self.node).match(line, state)
-        elif self.kind.startswith("{") and self.kind.endswith("}"):
-            # parse {n}, {n,}, {n,m}
-            content = self.kind[1:-1]
-            results = [(state.pos, state.groups)]
+        self._optional = OptionalMatcher(node)
+        self._plus = PlusMatcher(node)
+        self._star = StarMatcher(node)
+        # parse {n}, {n,}, {n,m}; max is None when unbounded
+        self.bounds: Optional[Tuple[int, Optional[int]]] = None
+        if kind.startswith("{") and kind.endswith("}"):
+            content = kind[1:-1]
             if "," in content:
-                # {n,} or {n,m}
                 parts = content.split(",")
-                n = int(parts[0])
-                m = int(parts[1]) if len(parts) > 1 and parts[1] else None
-                # Apply minimum n matches
-                for _ in range(n):
-                    next_results = []
-                    for p, g in results:
-                        ms = self.node.match(line, MatchState(p, g))
-                        for mstate in ms:
-                            next_results.append((mstate.pos, mstate.groups))
-                    results = next_results
-                    if not results:
-                        return set()
-                # Apply remaining optional matches up to m (or unlimited)
-                if m is None:
-                    all_states = set(MatchState(p, g) for p, g in results)
-                    for p, g in results:
-                        all_states |= StarMatcher(self.node).match(line, MatchState(p, g))
-                    return all_states
-                else:
-                    for _ in range(m - n):
-                        next_results = []
-                        for p, g in results:
-                            ms = self.node.match(line, MatchState(p, g))
-                            for mstate in ms:
-                                next_results.append((mstate.pos, mstate.groups))
-                        results += next_results
-                    return {MatchState(p, g) for p, g in results}
+                self.bounds = (int(parts[0]), int(parts[1]) if parts[1] else None)
             else:
-                # {n}
-                n = int(content)
-                for _ in range(n):
-                    next_results = []
-                    for p, g in results:
-                        ms = self.node.match(line, MatchState(p, g))
-                        for mstate in ms:
-                            next_results.append((mstate.pos, mstate.groups))
-                    results = next_results
-                    if not results:
-                        return set()
-                return {MatchState(p, g) for p, g in results}
+                self.bounds = (int(content), int(content))
+        # Without captures inside, groups cannot change while repeating the
+        # node, so counted repetition only needs to track positions.
+        self.capture_free = not any(isinstance(n, CaptureGroupMatcher) for n in walk(node))
+        self.memoizable = _group_free(self)
+
+    def _repeat(self, line: str, pos: int, groups: Groups, memo: Optional[Memo],
+                n: int, m: Optional[int]) -> Collection[State]:
+        """Apply {n,m} (m=None for unbounded) breadth-first over reachable states."""
+        node = self.node
+        if self.capture_free:
+            def step(frontier):
+                return {q for p in frontier for q in node.match_positions(line, p, groups, memo)}
+            states = {pos}
         else:
-            return self.node.match(line, state)
-
-
-
-
-
-
+            def step(frontier):
+                return {s for p, g in frontier for s in node._match(line, p, g, memo)}
+            states = {(pos, groups)}
+        for _ in range(n):
+            states = step(states)
+            if not states:
+                return []
+        # Each optional repetition only expands states not reached before
+        reached = set(states)
+        frontier = states
+        remaining = m - n if m is not None else None
+        while frontier and (remaining is None or remaining > 0):
+            frontier = step(frontier) - reached
+            reached |= frontier
+            if remaining is not None:
+                remaining -= 1
+        if self.capture_free:
+            return [(p, groups) for p in reached]
+        return reached
+
+    def _match(self, line: str, pos: int, groups: Groups, memo: Optional[Memo] = None) -> Collection[State]:
+        if self.kind == "?":
+            return self._optional._match(line, pos, groups, memo)
+        elif self.kind == "+":
+            return self._plus._match(line, pos, groups, memo)
+        elif self.kind == "*":
+            return self._star._match(line, pos, groups, memo)
+        elif self.bounds is not None:
+            return self._repeat(line, pos, groups, memo, *self.bounds)
+        else:
+            return self.node._match(line, pos, groups, memo)
@@ -0,0 +1,233 @@
+# core/nfa.py
+from typing import Callable, List, Optional, Tuple
+from .matcher import *
+
+# --------------------------
+# Thompson NFA bytecode
+# --------------------------
+# Each instruction is a tuple (op, arg1, arg2):
+#   CHAR  c, -        consume one character equal to c
+#   TEST  pred, -     consume one character for which pred(c) is true
+#   SPLIT x, y        fork: try x first, then y
+#   JMP   x, -        continue at x
+#   SAVE  slot, -     record the current position in a capture slot
+#   BOL   -, -        assert start of line
+#   EOL   -, -        assert end of line
+#   MATCH -, -        accept
+
+CHAR, TEST, SPLIT, JMP, SAVE, BOL, EOL, MATCH = range(8)
+
+Instruction = Tuple[int, object, object]
+
+
+def _is_word(c: str) -> bool:
+    return c.isalnum() or c == "_"
+
+
+def _any(c: str) -> bool:
+    return True
+
+
+def predicate(node: Matcher) -> Callable[[str], bool]:
+    """Return the single-character test performed by a leaf matcher."""
+    if isinstance(node, DigitMatcher):
+        return str.isdigit
+    if isinstance(node, WordMatcher):
+        return _is_word
+    if isinstance(node, AnyMatcher):
+        return _any
+    if isinstance(node, CharClassMatcher):
+        return node.accepts
+    raise TypeError(f"{type(node).__name__} is not a single-character matcher")
+
+
+class Program:
+    """
+    A compiled Thompson NFA executed by a PikeVM.
+
+    Attributes:
+        instructions: bytecode, one (op, arg1, arg2) tuple per pc.
+        nslots: number of capture slots (two per group: open and close).
+    """
+    def __init__(self, instructions: List[Instruction], nslots: int):
+        self.instructions = instructions
+        self.nslots = nslots
+
+    def _add_thread(self, pcs: List[int], caps: list, visited: bytearray,
+                    pc: int, slots: tuple, line: str, pos: int) -> None:
+        """Follow epsilon edges from pc and queue the consuming/accepting threads."""
+        insts = self.instructions
+        stack = [(pc, slots)]
+        while stack:
+            pc, slots = stack.pop()
+            if visited[pc]:
+                continue
+            visited[pc] = 1
+            op, a, b = insts[pc]
+            if op == JMP:
+                stack.append((a, slots))
+            elif op == SPLIT:
+                # Push the lower-priority branch first so `a` is explored first
+                stack.append((b, slots))
+                stack.append((a, slots))
+            elif op == SAVE:
+                stack.append((pc + 1, slots[:a] + (pos,) + slots[a + 1:]))
+            elif op == BOL:
+                if pos == 0:
+                    stack.append((pc + 1, slots))
+            elif op == EOL:
+                if pos == len(line):
+                    stack.append((pc + 1, slots))
+            else:
+                pcs.append(pc)
+                caps.append(slots)
+
+    def match(self, line: str, start: int) -> Optional[Tuple[int, tuple]]:
+        """
+        Run the PikeVM anchored at `start`.
+
+        Returns:
+            (end, slots) for the longest match, or None if nothing matches.
+        """
+        insts = self.instructions
+        size = len(insts)
+        L = len(line)
+        best = None
+
+        current: List[int] = []
+        current_caps: list = []
+        self._add_thread(current, current_caps, bytearray(size), 0,
+                         (-1,) * self.nslots, line, start)
+        pos = start
+        while current:
+            c = line[pos] if pos < L else None
+            nxt: List[int] = []
+            nxt_caps: list = []
+            visited = bytearray(size)
+            for pc, slots in zip(current, current_caps):
+                op, a, _ = insts[pc]
+                if op == MATCH:
+                    # Threads are in priority order; keep the first one per position
+                    if best is None or best[0] != pos:
+                        best = (pos, slots)
+                elif c is not None and (c == a if op == CHAR else a(c)):
+                    self._add_thread(nxt, nxt_caps, visited, pc + 1, slots, line, pos + 1)
+            current, current_caps = nxt, nxt_caps
+            pos += 1
+        return best
+
+    def longest_match(self, line: str, start: int) -> Optional[int]:
+        """Return the end of the longest match starting at `start`, or None."""
+        result = self.match(line, start)
+        return result[0] if result is not None else None
+
+
+class ProgramBuilder:
+    """Lowers a matcher tree into Thompson NFA bytecode."""
+    def __init__(self):
+        self.instructions: List[list] = []
+        self.max_gid = 0
+
+    def emit(self, op: int, a=None, b=None) -> int:
+        self.instructions.append([op, a, b])
+        return len(self.instructions) - 1
+
+    def build(self, root: Matcher) -> Program:
+        self._lower(root)
+        self.emit(MATCH)
+        instructions = [tuple(inst) for inst in self.instructions]
+        return Program(instructions, 2 * (self.max_gid + 1))
+
+    def _lower(self, node: Matcher) -> None:
+        if isinstance(node, LiteralMatcher):
+            self.emit(CHAR, node.char)
+        elif isinstance(node, LiteralRunMatcher):
+            for c in node.s:
+                self.emit(CHAR, c)
+        elif isinstance(node, SequenceMatcher):
+            for m in node.matchers:
+                self._lower(m)
+        elif isinstance(node, AlternationMatcher):
+            split = self.emit(SPLIT)
+            self.instructions[split][1] = len(self.instructions)
+            self._lower(node.left)
+            jmp = self.emit(JMP)
+            self.instructions[split][2] = len(self.instructions)
+            self._lower(node.right)
+            self.instructions[jmp][1] = len(self.instructions)
+        elif isinstance(node, OptionalMatcher):
+            self._optional(node.matcher)
+        elif isinstance(node, PlusMatcher):
+            self._plus(node.matcher)
+        elif isinstance(node, StarMatcher):
+            self._star(node.matcher)
+        elif isinstance(node, Quantified):
+            self._quantified(node)
+        elif isinstance(node, AnchorStartMatcher):
+            self.emit(BOL)
+        elif isinstance(node, AnchorEndMatcher):
+            self.emit(EOL)
+        elif isinstance(node, CaptureGroupMatcher):
+            self.max_gid = max(self.max_gid, node.gid)
+            self.emit(SAVE, 2 * node.gid)
+            self._lower(node.matcher)
+            self.emit(SAVE, 2 * node.gid + 1)
+        elif isinstance(node, BackreferenceMatcher):
+            raise ValueError("Backreferences cannot be compiled to an NFA")
+        else:
+            self.emit(TEST, predicate(node))
+
+    def _optional(self, node: Matcher) -> None:
+        split = self.emit(SPLIT)
+        self.instructions[split][1] = len(self.instructions)
+        self._lower(node)
+        self.instructions[split][2] = len(self.instructions)
+
+    def _plus(self, node: Matcher) -> None:
+        body = len(self.instructions)
+        self._lower(node)
+        self.emit(SPLIT, body, len(self.instructions) + 1)
+
+    def _star(self, node: Matcher) -> None:
+        split = self.emit(SPLIT)
+        self.instructions[split][1] = len(self.instructions)
+        self._lower(node)
+        self.emit(JMP, split)
+        self.instructions[split][2] = len(self.instructions)
+
+    def _quantified(self, node: Quantified) -> None:
+        kind = node.kind
+        if kind == "?":
+            return self._optional(node.node)
+        if kind == "+":
+            return self._plus(node.node)
+        if kind == "*":
+            return self._star(node.node)
+        if not (kind.startswith("{") and kind.endswith("}")):
+            return self._lower(node.node)
+        content = kind[1:-1]
+        if "," not in content:
+            n, m = int(content), int(content)
+        else:
+            parts = content.split(",")
+            n = int(parts[0])
+            m = int(parts[1]) if parts[1] else None
+        for _ in range(n):
+            self._lower(node.node)
+        if m is None:
+            self._star(node.node)
+            return
+        # Nested optionals: (x(x(x)?)?)? for the m - n optional repetitions
+        splits = []
+        for _ in range(m - n):
+            splits.append(self.emit(SPLIT, len(self.instructions) + 1))
+            self._lower(node.node)
+        for split in splits:
+            self.instructions[split][2] = len(self.instructions)
+
+
+def build_program(root: Matcher) -> Optional[Program]:
+    """Compile a matcher tree to a PikeVM program, or None if it uses backreferences."""
+    if any(isinstance(node, BackreferenceMatcher) for node in walk(root)):
+        return None
+    return ProgramBuilder().build(root)
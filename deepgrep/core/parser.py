@@ -58,13 +58,15 @@ class PatternParser:
     def _parse_term(self) -> Matcher:
         """
         Parse a sequence of factors (concatenation).
-        Example: abc → SequenceMatcher(Literal('a'), Literal('b'), Literal('c'))
+        Consecutive literals are fused into a single run.
+        Example: abc+ → SequenceMatcher(LiteralRun('ab'), Plus(Literal('c')))
         """
         factors = []
         while (c := self.peek()) is not None and c not in [")", "|"]:
             factors.append(self._parse_factor())
         if not factors:
             raise ParseError(f"Expected term at position {self.index}")
+        factors = fuse_literals(factors)
         # If only one factor, no need for a sequence node
         return factors[0] if len(factors) == 1 else SequenceMatcher(factors)
 
@@ -143,7 +145,8 @@ class PatternParser:
 
     def _parse_charset(self) -> Matcher:
         """
-        Parse a character class: [abc], [^abc]
+        Parse a character class: [abc], [^abc], [a-z0-9]
+        Ranges are kept as (first, last) pairs; a '-' at either end is a literal.
         """
         self.advance()  # skip '['
         negated = False
@@ -151,11 +154,20 @@ class PatternParser:
             negated = True
             self.advance()
         chars = []
+        ranges = []
         while (c := self.peek()) is not None and c != "]":
-            chars.append(self.advance())
+            start = self.advance()
+            if self.peek() == "-" and self.index + 1 < len(self.pattern) and self.pattern[self.index + 1] != "]":
+                self.advance()  # skip '-'
+                end = self.advance()
+                if ord(end) < ord(start):
+                    raise ParseError(f"Invalid range '{start}-{end}' at position {self.index - 3}")
+                ranges.append((start, end))
+            else:
+                chars.append(start)
         if self.advance() != "]":
             raise ParseError(f"Unterminated character class starting at position {self.index}")
-        return CharClassMatcher(chars, negated)
+        return CharClassMatcher(chars, negated, ranges)
 
     def _parse_group(self) -> Matcher:
         """
@@ -1,15 +1,41 @@
+import numpy as np
 import spacy
+from spacy.attrs import NAMES
+from functools import lru_cache
 from nltk.corpus import wordnet
-from typing import List, Tuple
+from typing import List, NamedTuple, Tuple
 
 
-def get_antonyms(word: str) -> set:
+@lru_cache(maxsize=1024)
+def get_antonyms(word: str) -> frozenset:
     antonyms = set()
     for syn in wordnet.synsets(word):
         for lemma in syn.lemmas():
             for ant in lemma.antonyms():
                 antonyms.add(ant.name())
-    return antonyms
+    return frozenset(antonyms)
+
+
+def quantize(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Quantize unit-normalized rows to int8 with one scale per row, so that
+    row / ||row|| ~= q[row] * scales[row]. Zero rows stay zero.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    unit = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+    scales = np.abs(unit).max(axis=1) / 127.0
+    q = np.round(unit / np.where(scales > 0, scales, 1.0)[:, None]).astype(np.int8)
+    return q, scales.astype(np.float32)
+
+
+class KeywordInfo(NamedTuple):
+    """What find_semantic_matches needs to know about a keyword."""
+    key: int  # the token attribute the vectors are keyed on (vectors.attr)
+    pos: str
+    vector: np.ndarray
+    norm: float
+    antonyms: frozenset
 
 
 class SemanticEngine:
@@ -17,31 +43,90 @@ class SemanticEngine:
 
     def __init__(self, model_name: str = "en_core_web_md"):
         try:
-            self.nlp = spacy.load(model_name)
+            # Only tagging (for POS) and vectors are used; skip parsing and NER
+            self.nlp = spacy.load(model_name, disable=["parser", "ner"])
         except OSError:
             raise RuntimeError(
                 f"SpaCy model '{model_name}' not found. Run: python -m spacy download {model_name}"
             )
+        # Per-instance cache so entries never outlive (or mix up) pipelines
+        self.keyword_info = lru_cache(maxsize=1024)(self._keyword_info)
+        self._quantized = None  # (int8 rows, per-row scales), built on first use
+
+    def _vector_keys(self, tokens: list) -> List[int]:
+        """
+        Vector table keys for tokens: the attribute named by vectors.attr
+        (ORTH by default, LOWER or NORM for some pipelines), as spaCy uses
+        for Token.vector and Token.similarity.
+        """
+        attr = NAMES[self.nlp.vocab.vectors.attr].lower()
+        return [getattr(token, attr) for token in tokens]
+
+    def _keyword_info(self, keyword: str) -> KeywordInfo:
+        key_token = self.nlp(keyword)[0]
+        vector = key_token.vector.copy()
+        return KeywordInfo(
+            key=self._vector_keys([key_token])[0],
+            pos=key_token.pos_,
+            vector=vector,
+            norm=float(np.linalg.norm(vector)),
+            antonyms=get_antonyms(keyword.lower()),
+        )
 
     def find_semantic_matches(self, text: str, keyword: str, top_n: int = 10) -> List[Tuple[str, float]]:
         doc = self.nlp(text)
-        key_token = self.nlp(keyword)[0]
-        antonyms = get_antonyms(keyword.lower())
-        results = []
-
-        for token in doc:
-            if not token.is_alpha or token.is_stop:
-                continue
-            # Only match similar POS (adjectives/verbs)
-            if token.pos_ != key_token.pos_ and key_token.pos_ in {"ADJ", "VERB"}:
-                continue
-            if token.text.lower() in antonyms:
-                continue  # skip antonyms
-            sim = key_token.similarity(token)
-            results.append((token.text, sim))
-
-        # Sort descending and keep top N
-        results = sorted(results, key=lambda x: x[1], reverse=True)[:top_n]
+        key = self.keyword_info(keyword)
+
+        tokens = [token for token in doc if token.is_alpha and not token.is_stop]
+        if not tokens or top_n <= 0:
+            return []
+
+        # Only match similar POS (adjectives/verbs), and skip antonyms
+        keep = np.array([token.text.lower() not in key.antonyms for token in tokens], dtype=bool)
+        if key.pos in {"ADJ", "VERB"}:
+            keep &= np.array([token.pos_ == key.pos for token in tokens], dtype=bool)
+        if not keep.any():
+            return []
+        tokens = [token for token, k in zip(tokens, keep) if k]
+
+        keys = self._vector_keys(tokens)
+        sims = self._similarities(tokens, keys, key)
+        sims[np.array([k == key.key for k in keys], dtype=bool)] = 1.0
+
+        # Keep top N (argpartition is O(n)), then sort just those descending
+        if top_n < len(sims):
+            idx = np.sort(np.argpartition(-sims, top_n - 1)[:top_n])
+        else:
+            idx = np.arange(len(sims))
+        idx = idx[np.argsort(-sims[idx], kind="stable")]
         # Filter out weak matches
-        results = [(w, s) for w, s in results if s > 0.45]
-        return results
\ No newline at end of file
+        return [(tokens[i].text, float(sims[i])) for i in idx if sims[i] > 0.45]
+
+    def _similarities(self, tokens: list, keys: List[int], key: KeywordInfo) -> np.ndarray:
+        """
+        Cosine similarity of every token against the keyword in one matmul;
+        zero vectors score 0, as with Token.similarity.
+        """
+        if key.norm == 0:
+            return np.zeros(len(tokens), dtype=np.float32)
+        key_unit = (key.vector / key.norm).astype(np.float32)
+        vectors = self.nlp.vocab.vectors
+        if vectors.size and vectors.mode == "default":
+            # Static word vectors: score int8 rows of the pre-quantized table.
+            # Only the ranking and a coarse threshold depend on the result,
+            # which per-row int8 scaling preserves.
+            if self._quantized is None:
+                self._quantized = quantize(vectors.data)
+            q, scales = self._quantized
+            rows = vectors.find(keys=np.array(keys, dtype=np.uint64))
+            found = rows >= 0
+            sims = np.zeros(len(tokens), dtype=np.float32)
+            sims[found] = (q[rows[found]].astype(np.float32) @ key_unit) * scales[rows[found]]
+            return sims
+        # Context vectors (pipelines without static vectors): full precision
+        vecs = np.stack([token.vector for token in tokens]).astype(np.float32)
+        norms = np.linalg.norm(vecs, axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sims = vecs @ key_unit / norms
+        sims[norms == 0] = 0.0
+        return sims
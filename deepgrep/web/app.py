@@ -1,9 +1,12 @@
 # app.py (small changes to init components and avoid nltk download in runtime)
 from flask import Flask, request, jsonify, render_template
 from flask_cors import CORS
-from deepgrep.core.engine import find_matches
+from deepgrep.core.engine import find_matches_in_lines
 from deepgrep.core.history import SearchHistoryDB
 from deepgrep.core.semantic_engine import SemanticEngine
+from concurrent.futures import ProcessPoolExecutor
+import math
+import os
 import threading
 
 app = Flask(__name__, template_folder="templates", static_folder="static")
@@ -13,6 +16,31 @@ CORS(app)
 semantic_engine = SemanticEngine()
 history_db = SearchHistoryDB()
 
+# Lines are matched independently, so large inputs are split into one
+# ordered chunk per worker process. Most of the matching work is Python
+# code holding the GIL, so threads would not run it in parallel; the pool
+# is started on first use, and smaller inputs are not worth pickling.
+SEARCH_WORKERS = os.cpu_count() or 1
+PARALLEL_MIN_LINES = 2048
+_search_executor = None
+_search_executor_lock = threading.Lock()
+
+def _get_search_executor():
+    global _search_executor
+    with _search_executor_lock:
+        if _search_executor is None:
+            _search_executor = ProcessPoolExecutor(max_workers=SEARCH_WORKERS)
+        return _search_executor
+
+def find_in_text(text, pattern):
+    lines = text.splitlines()
+    if SEARCH_WORKERS == 1 or len(lines) < PARALLEL_MIN_LINES:
+        return find_matches_in_lines(lines, pattern)
+    size = math.ceil(len(lines) / SEARCH_WORKERS)
+    chunks = [lines[i:i + size] for i in range(0, len(lines), size)]
+    results = _get_search_executor().map(find_matches_in_lines, chunks, [pattern] * len(chunks))
+    return [m for chunk in results for m in chunk]
+
 @app.route("/")
 def home():
     return render_template("index.html")
@@ -25,10 +53,7 @@ def search_regex():
     if not pattern or not text:
         return jsonify({"error": "Missing pattern or text"}), 400
 
-    matches = []
-    # Process lines in chunks or use map to speed up for long input; keep simple here
-    for line in text.splitlines():
-        matches.extend(find_matches(line, pattern))
+    matches = find_in_text(text, pattern)
 
     history_db.log_search(pattern, len(matches), ["web_input"])
     all_history = history_db.list_all(limit=50)
@@ -0,0 +1,37 @@
+import importlib
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from deepgrep.core import history, semantic_engine
+from deepgrep.core.engine import find_matches
+
+@pytest.fixture
+def app_module(monkeypatch, tmp_path):
+    """Import the web app with a stub SemanticEngine and a throwaway history DB."""
+    db_path = tmp_path / "history.db"
+    real_db = history.SearchHistoryDB
+    monkeypatch.setattr(semantic_engine, "SemanticEngine", lambda: None)
+    monkeypatch.setattr(history, "SearchHistoryDB", lambda: real_db(db_path))
+    monkeypatch.delitem(sys.modules, "deepgrep.web.app", raising=False)
+    module = importlib.import_module("deepgrep.web.app")
+    yield module
+    module.history_db.close()
+    if module._search_executor is not None:
+        module._search_executor.shutdown()
+    sys.modules.pop("deepgrep.web.app", None)
+
+def test_find_in_text_chunks_keep_line_order(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "SEARCH_WORKERS", 3)
+    monkeypatch.setattr(app_module, "PARALLEL_MIN_LINES", 2)
+    lines = [f"id{i} {i}-{i} x{i % 7}" for i in range(103)]
+    pattern = r"(\d+)-\1|x\d"
+    expected = [m for line in lines for m in find_matches(line, pattern)]
+    assert app_module.find_in_text("\n".join(lines), pattern) == expected
+    # Chunks ran in worker processes, which hold their own GIL
+    assert isinstance(app_module._search_executor, ProcessPoolExecutor)
+
+def test_small_inputs_stay_in_process(app_module):
+    assert app_module.find_in_text("a1\nb22", r"\d+") == ["1", "22"]
+    assert app_module._search_executor is None
@@ -15,4 +15,123 @@ def test_regex_word_char():
     line = "hello_world 42"
     pattern = r"\w+"
     matches = find_matches(line, pattern)
-    assert matches == ["hello_world", "42"]
\ No newline at end of file
+    assert matches == ["hello_world", "42"]
+
+def test_backreference():
+    line = "hello hello world world"
+    pattern = r"(\w+) \1"
+    matches = find_matches(line, pattern)
+    assert matches == ["hello hello", "world world"]
+
+
+def test_alternation_and_counted_quantifier():
+    line = "foobar aaab foo ab"
+    assert find_matches(line, r"foo(bar)?|a{2,3}b") == ["foobar", "aaab", "foo"]
+
+
+def test_anchors_and_non_latin1_input():
+    assert find_matches("ab ab", r"^ab") == ["ab"]
+    assert find_matches("ab ab", r"ab$") == ["ab"]
+    assert find_matches("€12 34", r"\d+") == ["12", "34"]
+
+
+def test_charset_ranges():
+    line = "2025-10-26 id=x7"
+    assert find_matches(line, r"[0-9]+") == ["2025", "10", "26", "7"]
+    assert find_matches(line, r"[a-z][0-9]") == ["x7"]
+    assert find_matches(line, r"[-=]") == ["-", "-", "="]
+
+
+def test_class_start_with_backreference():
+    assert find_matches("ab 12-12 3-4 x", r"(\d+)-\1") == ["12-12"]
+    assert find_matches("٣٣ 55", r"(\d)\1") == ["٣٣", "55"]
+    assert find_matches("a__b xx", r"(\w)\1") == ["__", "xx"]
+
+
+def test_concurrent_threads_share_results():
+    from concurrent.futures import ThreadPoolExecutor
+    lines = [f"id{i} {i}-{i} x" for i in range(200)]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda line: find_matches(line, r"(\d+)-\1"), lines))
+    assert results == [[f"{i}-{i}"] for i in range(200)]
+
+
+def test_dfa_is_minimized():
+    from deepgrep.core.dfa import build_dfa
+    from deepgrep.core.engine import compile_pattern
+    # dead, start and one shared "b*" state
+    assert build_dfa(compile_pattern("ab*|cb*")).transitions.shape[0] == 3
+    assert find_matches("abb cb a", "ab*|cb*") == ["abb", "cb", "a"]
+
+
+def test_generated_dfa_matcher_agrees_with_table():
+    from deepgrep.core.dfa import DFA, build_dfa
+    from deepgrep.core.engine import compile_pattern
+    data = b"ab user@abc.com 12-34 x_y zz\xe9"
+    for pattern in [r"\w+@[a-c]+\.com", r"\d+-\d+", r"^ab", r"z+.$", r"[^ ]*_y", r"x?"]:
+        dfa = build_dfa(compile_pattern(pattern))
+        assert "longest_match" in vars(dfa)  # small enough to be generated
+        for pos in range(len(data) + 1):
+            assert dfa.longest_match(data, pos) == DFA.longest_match(dfa, data, pos)
+
+
+def test_counted_quantifier_with_backreference():
+    # Backreferences force the matcher tree, so these exercise Quantified._repeat
+    assert find_matches("baab baaab bab baaaab", r"(b)a{2,3}\1") == ["baab", "baaab"]
+    assert find_matches("aba aabaa aaba ab", r"(a{1,2})b\1") == ["aba", "aabaa", "aba"]
+    # Captures inside the repeated node take the path that threads groups
+    assert find_matches("acbcb acbcac acacbcb", r"((a|b)c){2,3}\2") == ["acbcb", "acacbcb"]
+
+
+def test_literal_run_with_backreference():
+    # Backreferences keep this on the matcher tree, where "cd" is a LiteralRunMatcher
+    assert find_matches("abcdab", r"(ab)cd\1") == ["abcdab"]
+    assert find_matches("abcdac xabcdabcd", r"(ab)cd\1cd") == ["abcdabcd"]
+    # Runs as alternation branches go through LiteralRunMatcher._match
+    assert find_matches("xcdefx xcdx xy", r"(x)(cd|ef)+\1") == ["xcdefx", "xcdx"]
+
+
+def test_large_dfa_falls_back_to_pikevm():
+    from deepgrep.core.dfa import MAX_STATES, build_dfa
+    from deepgrep.core.engine import compile_pattern
+    # .*a.{11} needs 2**12 subset states; construction gives up at the cap
+    assert build_dfa(compile_pattern(r".*a.{11}")) is None
+    assert find_matches("xa" + "b" * 11, r".*a.{11}") == ["xa" + "b" * 11]
+    assert len(build_dfa(compile_pattern(r".*a.{6}")).transitions) <= MAX_STATES
+
+
+def test_scan_matches_python_fallback(monkeypatch):
+    from deepgrep.core import dfa as dfa_module
+    from deepgrep.core.engine import compile_pattern
+    data = b"ab abab 12-34 x_y ba\xe9 aab"
+    scanners = [dfa_module._scan] + ([dfa_module.scan] if dfa_module.scan is not None else [])
+    for pattern in [r"ab", r"a*", r"\d+", r"^ab", r"ab$", r"^a.*b$", r"[^ ]+", r"b?a", r"x?", r"é|ab"]:
+        dfa = dfa_module.build_dfa(compile_pattern(pattern))
+        monkeypatch.setattr(dfa_module, "scan", None)
+        expected = dfa.find_spans(data)
+        for scanner in scanners:
+            monkeypatch.setattr(dfa_module, "scan", scanner)
+            assert dfa.find_spans(data) == expected, (pattern, scanner)
+
+
+def test_wide_charset_ranges():
+    import re
+    line = "aĀx b\U0001f600x €y ωx Ωz _x"
+    for pattern in ["[Ā-\U0010ffff]x", "[^Ā-\U0010ffff]x", "[α-ωΑ-Ω€a]", "[^α-ω ]x", "(b)[Ā-\U0010ffff]x"]:
+        assert find_matches(line, pattern) == [m.group(0) for m in re.finditer(pattern, line)], pattern
+
+
+def test_empty_class_matches_nothing():
+    assert find_matches("abc", "[](a)") == []  # PikeVM path
+    assert find_matches("€", "[]") == []  # non-latin-1 line skips the DFA
+    assert find_matches("a€", "(a)[]\\1") == []  # matcher tree
+    assert match_pattern("€", "[]") is False
+
+
+def test_matching_does_not_mutate_shared_tree():
+    from deepgrep.core.engine import compile_pattern
+    from deepgrep.core.matcher import walk
+    pattern = r"(\w+) (a|b)*c{1,2}\1"
+    before = {id(node): dict(vars(node)) for node in walk(compile_pattern(pattern))}
+    assert find_matches("xy abacxy", pattern) == ["xy abacxy"]
+    assert {id(node): vars(node) for node in walk(compile_pattern(pattern))} == before
@@ -0,0 +1,78 @@
+import pytest
+from deepgrep.core.history import MAX_HISTORY, PRUNE_EVERY, SearchHistoryDB
+
+@pytest.fixture
+def db(tmp_path):
+    history = SearchHistoryDB(tmp_path / "history.db")
+    yield history
+    history.close()
+
+def test_buffered_logs_visible_to_reads(db):
+    db.log_search(r"\d+", 3, ["a.txt"])
+    db.log_search("foo", 1, ["b.txt"])
+    recent = db.get_recent(5)
+    assert [r[0] for r in recent] == ["foo", r"\d+"]
+    assert recent[1][2] == 3
+
+def test_log_searches_batch(db):
+    db.log_searches([("foo", 1, []), ("bar", 2, []), ("foo", 0, [])])
+    assert db.get_top_patterns(1) == [("foo", 2)]
+    assert len(db.list_all()) == 3
+
+def test_close_flushes_pending(tmp_path):
+    path = tmp_path / "history.db"
+    history = SearchHistoryDB(path)
+    history.log_search("foo", 1, [])
+    history.close()
+    assert SearchHistoryDB(path).get_recent(5)[0][0] == "foo"
+
+def test_history_trimmed_to_max(db):
+    db.log_searches([(f"p{i}", i, []) for i in range(MAX_HISTORY + 30)])
+    rows = db.list_all()
+    assert len(rows) == MAX_HISTORY
+    assert rows[0][0] == f"p{MAX_HISTORY + 29}"
+
+def test_top_patterns_follow_trimming(db):
+    db.log_searches([("old", 0, [])] * 10 + [("new", 0, [])] * MAX_HISTORY)
+    assert db.get_top_patterns(5) == [("new", MAX_HISTORY)]
+
+def test_short_lived_instances_still_trim(tmp_path):
+    path = tmp_path / "history.db"
+    for i in range(MAX_HISTORY + 100):
+        history = SearchHistoryDB(path)
+        history.log_search(f"p{i}", 0, [])
+        history.close()
+    history = SearchHistoryDB(path)
+    (count,) = history.conn.execute("SELECT COUNT(*) FROM search_logs").fetchone()
+    assert count < MAX_HISTORY + PRUNE_EVERY
+    history.close()
+
+def test_read_limits_are_capped(db):
+    db.log_searches([(f"p{i}", 0, []) for i in range(MAX_HISTORY + 40)])
+    db.log_searches([("q", 0, [])] * 10)
+    assert len(db.list_all(limit=50)) == MAX_HISTORY  # limit is not applied, as before
+    assert len(db.list_all()) == MAX_HISTORY
+    assert len(db.get_recent(MAX_HISTORY + 100)) == MAX_HISTORY
+
+def test_top_patterns_match_visible_rows_between_trims(db):
+    db.log_searches([("old", 0, [])] * 30 + [("new", 0, [])] * MAX_HISTORY)
+    # Ids 231..245 do not cross a PRUNE_EVERY boundary, so no write-side trim
+    db.log_searches([("x", 0, [])] * 15)
+    visible = [r[0] for r in db.list_all()]
+    assert visible.count("new") == MAX_HISTORY - 15
+    assert db.get_top_patterns(5) == [("new", MAX_HISTORY - 15), ("x", 15)]
+
+def test_upgrade_backfills_pattern_counts(tmp_path):
+    import sqlite3
+    path = tmp_path / "history.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE search_logs (id INTEGER PRIMARY KEY AUTOINCREMENT, pattern TEXT NOT NULL, "
+                 "timestamp TEXT NOT NULL, match_count INTEGER, files TEXT)")
+    conn.executemany("INSERT INTO search_logs (pattern, timestamp, match_count, files) VALUES (?, '', 0, '[]')",
+                     [("a",), ("a",), ("b",)])
+    conn.commit()
+    conn.close()
+    first, second = SearchHistoryDB(path), SearchHistoryDB(path)
+    assert second.get_top_patterns(5) == [("a", 2), ("b", 1)]
+    first.close()
+    second.close()
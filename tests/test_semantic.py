@@ -1,4 +1,9 @@
+import numpy as np
 import pytest
+import spacy
+from spacy.vectors import Vectors
+
+from deepgrep.core import semantic_engine
 from deepgrep.core.semantic_engine import SemanticEngine
 
 @pytest.fixture
@@ -10,4 +15,61 @@ def test_semantic_similarity(engine):
     keyword = "happy"
     results = engine.find_semantic_matches(text, keyword)
     words = [w for w, _ in results]
-    assert "happy" in words or "joyful" in words
\ No newline at end of file
+    assert "happy" in words or "joyful" in words
+
+
+class _NoWordnet:
+    @staticmethod
+    def synsets(word):
+        return []
+
+def blank_engine(monkeypatch, vectors, attr="ORTH"):
+    """A SemanticEngine over spacy.blank("en") with the given word vectors."""
+    nlp = spacy.blank("en")
+    dim = len(next(iter(vectors.values())))
+    nlp.vocab.vectors = Vectors(strings=nlp.vocab.strings, shape=(len(vectors), dim), attr=attr)
+    for word, vector in vectors.items():
+        nlp.vocab.set_vector(word, np.asarray(vector, dtype=np.float32))
+    monkeypatch.setattr(semantic_engine.spacy, "load", lambda name, disable=(): nlp)
+    monkeypatch.setattr(semantic_engine, "wordnet", _NoWordnet())
+    return SemanticEngine()
+
+def test_vectors_keyed_on_lower(monkeypatch):
+    engine = blank_engine(monkeypatch, {"happy": [1, 0, 0], "glad": [0.9, 0.3, 0]}, attr="LOWER")
+    scores = dict(engine.find_semantic_matches("Happy GLAD", "happy"))
+    assert scores["Happy"] == 1.0
+    assert scores["GLAD"] == pytest.approx(engine.nlp("happy")[0].similarity(engine.nlp("GLAD")[0]), abs=0.02)
+
+def test_zero_and_missing_vectors_score_zero(monkeypatch):
+    engine = blank_engine(monkeypatch, {"happy": [1, 0, 0], "glad": [1, 1, 0], "zero": [0, 0, 0]})
+    tokens = list(engine.nlp("glad zero unknown"))
+    key = engine.keyword_info("happy")
+    sims = engine._similarities(tokens, engine._vector_keys(tokens), key)
+    assert sims[0] == pytest.approx(2 ** -0.5, abs=0.01)
+    assert sims[1] == 0.0 and sims[2] == 0.0
+    assert engine.find_semantic_matches("glad zero unknown", "happy") == [("glad", pytest.approx(2 ** -0.5, abs=0.01))]
+
+def test_keyword_itself_scores_one(monkeypatch):
+    engine = blank_engine(monkeypatch, {"happy": [1, 2, 3], "zero": [0, 0, 0]})
+    assert engine.find_semantic_matches("happy", "happy") == [("happy", 1.0)]
+    # As with Token.similarity, the same word scores 1.0 even without a vector
+    assert engine.find_semantic_matches("zero", "zero") == [("zero", 1.0)]
+
+def test_top_n_keeps_ties_in_text_order(monkeypatch):
+    engine = blank_engine(monkeypatch, {"happy": [1, 0], "glad": [1, 1], "merry": [1, 1], "sad": [0, 1]})
+    results = engine.find_semantic_matches("glad sad merry happy glad", "happy", top_n=3)
+    assert [w for w, _ in results] == ["happy", "glad", "merry"]
+    assert engine.find_semantic_matches("glad sad merry", "happy", top_n=0) == []
+
+def test_int8_scores_follow_token_similarity(monkeypatch):
+    rng = np.random.default_rng(0)
+    words = ["happy", "glad", "merry", "cheerful", "content", "dog", "cat", "run", "walk", "blue"]
+    base = rng.normal(size=50)
+    engine = blank_engine(monkeypatch, {w: base + rng.normal(size=50) for w in words})
+    doc = engine.nlp(" ".join(words[1:]))
+    key_token = engine.nlp("happy")[0]
+    exact = {token.text: key_token.similarity(token) for token in doc}
+    results = engine.find_semantic_matches(doc.text, "happy", top_n=len(words))
+    assert [w for w, _ in results] == sorted((w for w in exact if exact[w] > 0.45), key=exact.get, reverse=True)
+    for word, score in results:
+        assert score == pytest.approx(exact[word], abs=0.02)